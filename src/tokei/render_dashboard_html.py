@@ -20,11 +20,12 @@ renderer only:
 
 from __future__ import annotations
 
+import functools
 import json
 import sys
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 
 try:
     from tokei_errors import CONFIG, OUTPUT
@@ -34,10 +35,12 @@ except ModuleNotFoundError:
 
 def format_hms(total_seconds: int) -> str:
     sign = "-" if total_seconds < 0 else ""
-    s = abs(int(round(total_seconds)))
-    h = s // 3600
-    m = (s % 3600) // 60
-    sec = s % 60
+    if isinstance(total_seconds, int):
+        s = abs(total_seconds)
+    else:
+        s = abs(int(round(total_seconds)))
+    h, rem = divmod(s, 3600)
+    m, sec = divmod(rem, 60)
     return f"{sign}{h:d}:{m:02d}:{sec:02d}"
 
 
@@ -75,6 +78,26 @@ def format_chars(value: int) -> str:
     return format_k(v)
 
 
+@functools.lru_cache(maxsize=1)
+def _get_template() -> Template:
+    # Set up Jinja2 environment pointing at the design template. The template never
+    # changes while the process is alive, so skip the per-render mtime checks.
+    root = Path(__file__).resolve().parents[2]
+    templates_dir = root / "design" / "templates"
+
+    env = Environment(
+        loader=FileSystemLoader(str(templates_dir)),
+        autoescape=select_autoescape(["html", "xml"]),
+        auto_reload=False,
+    )
+
+    # Register filters used in the template.
+    env.filters["format_k"] = format_k
+    env.filters["format_chars"] = format_chars
+
+    return env.get_template("report.html.j2")
+
+
 def main(argv: list[str]) -> int:
     if len(argv) != 3:
         print(
@@ -113,20 +136,7 @@ def main(argv: list[str]) -> int:
     delta_avg_seconds = int(stats.get("avg_immersion_delta_seconds") or 0)
     stats["avg_immersion_delta_hms"] = format_hms(delta_avg_seconds)
 
-    # Set up Jinja2 environment pointing at the design template.
-    root = Path(__file__).resolve().parents[2]
-    templates_dir = root / "design" / "templates"
-
-    env = Environment(
-        loader=FileSystemLoader(str(templates_dir)),
-        autoescape=select_autoescape(["html", "xml"]),
-    )
-
-    # Register filters used in the template.
-    env.filters["format_k"] = format_k
-    env.filters["format_chars"] = format_chars
-
-    template = env.get_template("report.html.j2")
+    template = _get_template()
 
     html = template.render(stats=stats, format_hms=format_hms, format_k=format_k)
 
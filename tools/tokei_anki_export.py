@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import argparse
 import hashlib
 import json
 import os
 import re
 import sqlite3
+import sys
 import tempfile
 import unicodedata
 from dataclasses import dataclass
@@ -18,6 +20,8 @@ DEFAULT_ANKI_SNAPSHOT_OUTPUT_DIR = "anki_snapshot"
 LEGACY_ANKI_SNAPSHOT_OUTPUT_DIR = "hashi_exports"
 SNAPSHOT_MIGRATION_FILES = ("anki_stats_snapshot.json", "known_words.sqlite")
 
+_WS_RE = re.compile(r"\s+")
+
 
 @dataclass(frozen=True)
 class AnkiSnapshotRule:
@@ -79,8 +83,11 @@ def _json_dump_atomic(path: Path, obj: Any) -> None:
 
 def _normalize_surface_for_identity(surface: str) -> str:
     s = str(surface or "").strip()
+    if s.isascii():
+        # NFC is a no-op on ASCII, and str.split() matches exactly what \s matches.
+        return " ".join(s.split())
     s = unicodedata.normalize("NFC", s)
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
     return s
 
 
@@ -225,6 +232,9 @@ def _connect_sqlite_ro(db_path: Path, *, busy_timeout_ms: int) -> sqlite3.Connec
         con.create_collation("unicase", _unicase_cmp)
         con.execute(f"PRAGMA busy_timeout={int(max(0, busy_timeout_ms))};")
         con.execute("PRAGMA query_only=ON;")
+        con.execute("PRAGMA cache_size=-65536;")
+        con.execute("PRAGMA mmap_size=268435456;")
+        con.execute("PRAGMA temp_store=MEMORY;")
     except sqlite3.Error:
         pass
     return con
@@ -432,7 +442,9 @@ def _mature_lexeme_surfaces(
         mid_filter = f" AND n.mid IN ({mid_placeholders})"
         params.extend([int(m) for m in note_type_ids])
 
-    rows = con.execute(
+    # Iterate the cursor instead of fetchall(): only the target field is kept, so the
+    # full note field blobs never need to be held in memory at once.
+    cur = con.execute(
         f"""
         SELECT n.mid, n.flds
         FROM cards c
@@ -443,9 +455,9 @@ def _mature_lexeme_surfaces(
         ORDER BY c.id
         """,
         params,
-    ).fetchall()
+    )
     out: list[str] = []
-    for mid, flds in rows:
+    for mid, flds in cur:
         mid_i = int(mid)
         field_ord = field_ord_by_mid.get(mid_i)
         if field_ord is None:
@@ -495,8 +507,9 @@ def _count_true_reviews(
     row = con.execute(
         f"""
         SELECT
-          SUM(CASE WHEN r.ease != 1 THEN 1 ELSE 0 END) AS correct,
-          COUNT(*) AS total
+          COALESCE(SUM(CASE WHEN r.ease != 1 THEN 1 ELSE 0 END), 0) AS correct,
+          COUNT(*) AS total,
+          MIN(r.id) AS first_id
         FROM revlog r
         JOIN cards c ON c.id = r.cid
         WHERE r.type = 1
@@ -506,25 +519,15 @@ def _count_true_reviews(
         """,
         params,
     ).fetchone()
-    correct = int(row[0] or 0) if row else 0
-    total = int(row[1] or 0) if row else 0
+    correct = int(row[0])
+    total = int(row[1])
 
+    # Without a time filter the earliest matching review comes from the same scan.
     used_start_ms: int | None
     if start_ms is not None:
         used_start_ms = int(start_ms)
     else:
-        min_row = con.execute(
-            f"""
-            SELECT MIN(r.id)
-            FROM revlog r
-            JOIN cards c ON c.id = r.cid
-            WHERE r.type = 1
-              AND c.did IN ({did_placeholders})
-              AND c.ivl >= ?
-            """,
-            params,
-        ).fetchone()
-        used_start_ms = int(min_row[0]) if min_row and min_row[0] is not None else None
+        used_start_ms = int(row[2]) if row[2] is not None else None
 
     return total, correct, used_start_ms
 
@@ -554,7 +557,7 @@ def _count_cards_studied(
         """,
         params,
     ).fetchone()
-    return int(row[0] or 0) if row else 0
+    return int(row[0])
 
 
 def export_snapshot(*, root: Path, trigger: str) -> Path:
@@ -707,11 +710,17 @@ def export_snapshot(*, root: Path, trigger: str) -> Path:
             },
         }
 
+    # Several mature cards of one note (and overlapping rules) repeat the same surface;
+    # upserting a repeat is a no-op, so dedupe up front while keeping first-seen order.
+    unique_lexemes: dict[tuple[str, str], None] = dict.fromkeys(
+        (rule_id, surface) for _snapshot_ts, rule_id, _deck_id, surface in all_lexemes
+    )
+
     with sqlite3.connect(str(known_words_db_path)) as kw_con:
         _ensure_known_words_schema(kw_con)
         kw_con.execute("BEGIN")
         try:
-            for _snapshot_ts, rule_id, _deck_id, surface in all_lexemes:
+            for rule_id, surface in unique_lexemes:
                 normalized = _normalize_surface_for_identity(surface)
                 if not normalized:
                     continue
@@ -803,8 +812,6 @@ def discover_collection(*, profile: str) -> dict[str, Any]:
 
 
 def main(argv: list[str]) -> int:
-    import argparse
-
     parser = argparse.ArgumentParser()
     parser.add_argument("--trigger", default="tokei")
     parser.add_argument("--discover", action="store_true")
@@ -825,8 +832,6 @@ def main(argv: list[str]) -> int:
         # On Windows, stdout can default to a legacy codepage (e.g. cp1252) that can't print JP deck names.
         # Write UTF-8 bytes directly so discovery works regardless of console encoding.
         try:
-            import sys
-
             sys.stdout.buffer.write(payload_text.encode("utf-8", errors="replace"))
             sys.stdout.buffer.write(b"\n")
         except Exception:
@@ -838,6 +843,4 @@ def main(argv: list[str]) -> int:
 
 
 if __name__ == "__main__":  # pragma: no cover
-    import sys
-
     raise SystemExit(main(sys.argv))
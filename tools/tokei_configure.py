@@ -96,8 +96,6 @@ def main(argv: list[str]) -> int:
 
 
 if __name__ == "__main__":  # pragma: no cover
-    import sys
-
     try:
         raise SystemExit(main(sys.argv))
     except ConfigError as e:
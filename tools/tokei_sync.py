@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import base64
 import csv
 import hashlib
@@ -14,6 +15,7 @@ import unicodedata
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
+from itertools import islice
 from pathlib import Path
 from typing import Any
 from urllib import error, parse, request
@@ -66,14 +68,53 @@ DEFAULT_ANKI_SNAPSHOT_OUTPUT_DIR = "anki_snapshot"
 LEGACY_ANKI_SNAPSHOT_OUTPUT_DIR = "hashi_exports"
 SNAPSHOT_MIGRATION_FILES = ("anki_stats_snapshot.json", "known_words.sqlite")
 
+_WS_RE = re.compile(r"\s+")
+_JP_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff]")
+_ALPHA_RE = re.compile(r"[A-Za-z]")
+_HEADER_WORDS = frozenset(
+    {
+        "word",
+        "words",
+        "surface",
+        "expression",
+        "lexeme",
+        "lemma",
+        "lemmas",
+        "dictform",
+        "dict_form",
+        "dictionaryform",
+    }
+)
+# Every keyword is lowercase ASCII, so a match also implies the old "[a-z]" check.
+_HEADER_HINT_RE = re.compile(
+    r"word|surface|expression|lexeme|lemma|morph|dictform|dict_form|hascard|reading|translation"
+)
+
 
 def _normalize_surface_for_identity(surface: str) -> str:
     s = str(surface or "").strip()
+    if s.isascii():
+        # NFC is a no-op on ASCII, and str.split() matches exactly what \s matches.
+        return " ".join(s.split())
     s = unicodedata.normalize("NFC", s)
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
     return s
 
 
+def _connect_sqlite_ro(db_path: Path) -> sqlite3.Connection:
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        # Read-only analytic queries: a larger page cache, mmap'd B-tree pages and
+        # in-memory temp B-trees for COUNT(DISTINCT ...)/GROUP BY.
+        con.execute("PRAGMA query_only=ON;")
+        con.execute("PRAGMA cache_size=-65536;")
+        con.execute("PRAGMA mmap_size=268435456;")
+        con.execute("PRAGMA temp_store=MEMORY;")
+    except sqlite3.Error:
+        pass
+    return con
+
+
 def _normalize_anki_snapshot_output_dir(value: Any) -> str:
     raw = str(value or "").strip()
     if not raw or raw == LEGACY_ANKI_SNAPSHOT_OUTPUT_DIR:
@@ -211,7 +252,7 @@ def _extract_bolded_term(surface: str) -> str | None:
     if len(candidates) == 1:
         return candidates[0]
 
-    jp = [t for t in candidates if re.search(r"[\u3040-\u30ff\u3400-\u9fff]", t)]
+    jp = [t for t in candidates if _JP_RE.search(t)]
     if len(jp) == 1:
         return jp[0]
     if jp:
@@ -270,7 +311,7 @@ def _phase2_import_anki_snapshot_lexemes(
         return 0
 
     imported = 0
-    src_con = sqlite3.connect(f"file:{src_db}?mode=ro", uri=True)
+    src_con = _connect_sqlite_ro(src_db)
     try:
         rows = src_con.execute(
             "SELECT content_key, surface, normalized_surface, rule_id, first_seen, last_seen FROM lexemes"
@@ -301,6 +342,27 @@ def _phase2_import_anki_snapshot_lexemes(
     return imported
 
 
+def _read_known_csv_rows(path: Path) -> list[list[str]]:
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        return list(csv.reader(f))
+
+
+def _normalize_first_cells(rows: list[list[str]]) -> list[str]:
+    # Same result as _normalize_surface_for_identity() per cell, but NFC runs once over
+    # the whole column (skipped entirely for ASCII) and whitespace is collapsed with
+    # str.split(), which splits on exactly the characters matched by \s.
+    cells = [str(r[0] or "") if r else "" for r in rows]
+    joined = "\x1f".join(cells)
+    if joined.isascii():
+        normalized = cells
+    elif any("\x1f" in c for c in cells):
+        normalized = [unicodedata.normalize("NFC", c) for c in cells]
+    else:
+        # U+001F is a starter that never composes, so NFC cannot merge across it.
+        normalized = unicodedata.normalize("NFC", joined).split("\x1f")
+    return [" ".join(c.split()) for c in normalized]
+
+
 def _phase2_ingest_known_csv(
     con: sqlite3.Connection,
     *,
@@ -325,75 +387,50 @@ def _phase2_ingest_known_csv(
         return 0
 
     inserted = 0
+    # Surfaces already upserted by an earlier file (or row) in this pass. Re-upserting
+    # them is a no-op, so skip the hash + SQL round-trip.
+    seen: set[str] = set()
     for csv_path in csv_paths:
         try:
-            with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
-                reader = csv.reader(f)
-                rows = list(reader)
+            rows = _read_known_csv_rows(csv_path)
         except Exception:
             continue
 
+        firsts = _normalize_first_cells(rows)
+
         def _has_japanese_chars(value: str) -> bool:
-            return bool(re.search(r"[\u3040-\u30ff\u3400-\u9fff]", value))
+            return bool(_JP_RE.search(value))
 
         def _next_nonempty_first(start: int) -> str:
-            for r in rows[start:]:
-                cell = _normalize_surface_for_identity(r[0] if r else "")
+            for cell in islice(firsts, start, None):
                 if cell:
                     return cell
             return ""
 
         def _looks_like_header_row(idx: int) -> bool:
             r = rows[idx]
-            first = _normalize_surface_for_identity(r[0] if r else "")
+            first = firsts[idx]
             if not first:
                 return False
 
             first_lc = first.lower()
-            header_words = {
-                "word",
-                "words",
-                "surface",
-                "expression",
-                "lexeme",
-                "lemma",
-                "lemmas",
-                "dictform",
-                "dict_form",
-                "dictionaryform",
-            }
-            if first_lc in header_words:
+            if first_lc in _HEADER_WORDS:
                 return True
 
-            if re.search(r"[a-z]", first_lc) and any(
-                k in first_lc
-                for k in (
-                    "word",
-                    "surface",
-                    "expression",
-                    "lexeme",
-                    "lemma",
-                    "morph",
-                    "dictform",
-                    "dict_form",
-                    "hascard",
-                    "reading",
-                    "translation",
-                )
-            ):
+            if _HEADER_HINT_RE.search(first_lc):
                 return True
 
             if len(r) > 1:
                 rest = _normalize_surface_for_identity(" ".join(str(x or "") for x in r[1:]))
                 if (
-                    re.search(r"[A-Za-z]", first)
-                    and re.search(r"[A-Za-z]", rest)
+                    _ALPHA_RE.search(first)
+                    and _ALPHA_RE.search(rest)
                     and not _has_japanese_chars(first)
                     and not _has_japanese_chars(rest)
                 ):
                     return True
 
-            if re.search(r"[A-Za-z]", first) and not _has_japanese_chars(first):
+            if _ALPHA_RE.search(first) and not _has_japanese_chars(first):
                 next_first = _next_nonempty_first(idx + 1)
                 if next_first and _has_japanese_chars(next_first):
                     return True
@@ -402,10 +439,9 @@ def _phase2_ingest_known_csv(
 
         start_idx = 0
         while start_idx < len(rows) and _looks_like_header_row(start_idx):
-            header_surface = _normalize_surface_for_identity(
-                rows[start_idx][0] if rows[start_idx] else ""
-            )
+            header_surface = firsts[start_idx]
             if header_surface:
+                seen.discard(header_surface)
                 try:
                     header_key = _content_key_for_lexeme(header_surface, rule_id)
                     row = con.execute(
@@ -420,11 +456,10 @@ def _phase2_ingest_known_csv(
             start_idx += 1
 
         day_s = today.isoformat()
-        for row in rows[start_idx:]:
-            surface_raw = row[0] if row else ""
-            surface = _normalize_surface_for_identity(surface_raw)
-            if not surface:
+        for surface in islice(firsts, start_idx, None):
+            if not surface or surface in seen:
                 continue
+            seen.add(surface)
             key = _content_key_for_lexeme(surface, rule_id)
             _upsert_lexeme(
                 con,
@@ -786,10 +821,10 @@ def _read_tokei_surface_words(root: Path) -> int:
     words_db = root / "cache" / "tokei_words.sqlite"
     if not words_db.exists():
         return 0
-    con = sqlite3.connect(f"file:{words_db}?mode=ro", uri=True)
+    con = _connect_sqlite_ro(words_db)
     try:
-        row = con.execute("SELECT COUNT(DISTINCT normalized_surface) FROM lexemes").fetchone()
-        return int(row[0] or 0) if row else 0
+        (count,) = con.execute("SELECT COUNT(DISTINCT normalized_surface) FROM lexemes").fetchone()
+        return int(count)
     except sqlite3.Error:
         return 0
     finally:
@@ -1100,14 +1135,12 @@ def _resolve_gsm_db_path(cfg: Config, warnings: list[str] | None = None) -> Path
 def _read_gsm_db_lifetime_chars(con: sqlite3.Connection) -> int:
     row = con.execute(
         """
-        SELECT SUM(CAST(total_characters AS INTEGER)) AS lifetime_chars
+        SELECT COALESCE(SUM(CAST(total_characters AS INTEGER)), 0) AS lifetime_chars
         FROM daily_stats_rollup
         WHERE total_characters IS NOT NULL AND total_characters != ''
         """
     ).fetchone()
-    if not row or row[0] is None:
-        return 0
-    return int(row[0] or 0)
+    return int(row[0])
 
 
 def _detect_gsm_rollup_day_column(
@@ -1189,26 +1222,26 @@ def _read_gsm_db_day_chars(
     if kind in ("iso_text", "text"):
         row = con.execute(
             f"""
-            SELECT SUM(CAST(total_characters AS INTEGER))
+            SELECT COALESCE(SUM(CAST(total_characters AS INTEGER)), 0)
             FROM daily_stats_rollup
             WHERE {day_col} = ? OR {day_col} LIKE ?
             """,
             (day_str, day_str + "%"),
         ).fetchone()
-        # If there's no row for this day yet, treat as 0 (rollup missing).
-        return int(row[0] or 0) if row and row[0] is not None else 0
+        # If there's no row for this day yet, COALESCE treats it as 0 (rollup missing).
+        return int(row[0])
 
     if kind == "ymd_int":
         ymd_int = int(today.strftime("%Y%m%d"))
         row = con.execute(
             f"""
-            SELECT SUM(CAST(total_characters AS INTEGER))
+            SELECT COALESCE(SUM(CAST(total_characters AS INTEGER)), 0)
             FROM daily_stats_rollup
             WHERE CAST({day_col} AS INTEGER) = ?
             """,
             (ymd_int,),
         ).fetchone()
-        return int(row[0] or 0) if row and row[0] is not None else 0
+        return int(row[0])
 
     # unix timestamps
     start_dt = datetime.combine(today, time.min, tzinfo=tz)
@@ -1220,13 +1253,13 @@ def _read_gsm_db_day_chars(
         end_ts *= 1000.0
     row = con.execute(
         f"""
-        SELECT SUM(CAST(total_characters AS INTEGER))
+        SELECT COALESCE(SUM(CAST(total_characters AS INTEGER)), 0)
         FROM daily_stats_rollup
         WHERE {day_col} >= ? AND {day_col} < ?
         """,
         (start_ts, end_ts),
     ).fetchone()
-    return int(row[0] or 0) if row and row[0] is not None else 0
+    return int(row[0])
 
 
 def _try_read_gsm_db_today_chars(
@@ -1255,13 +1288,13 @@ def _read_gsm_live_today_chars(
     if not live_db.exists():
         return None
     try:
-        con = sqlite3.connect(f"file:{live_db}?mode=ro", uri=True)
+        con = _connect_sqlite_ro(live_db)
         try:
             row = con.execute(
                 "SELECT COALESCE(SUM(total_chars), 0) FROM gsm_sessions WHERE day = ?",
                 (today.isoformat(),),
             ).fetchone()
-            return int(row[0] or 0) if row else 0
+            return int(row[0])
         finally:
             con.close()
     except sqlite3.Error as e:
@@ -1280,7 +1313,7 @@ def _read_gsm_live_daily_totals(
         return None
 
     try:
-        con = sqlite3.connect(f"file:{live_db}?mode=ro", uri=True)
+        con = _connect_sqlite_ro(live_db)
         try:
             rows = con.execute(
                 """
@@ -1527,8 +1560,6 @@ def _compute_immersion_windows(
 
 
 def main(argv: list[str]) -> int:
-    import argparse
-
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--sync-only",
@@ -1617,20 +1648,24 @@ def main(argv: list[str]) -> int:
                 rule_id=cfg.phase2_csv_rule_id,
             )
 
-            missing_lemmas = int(
+            # Only "is anything unlinked?" matters here; EXISTS stops at the first hit
+            # instead of counting the whole join that _phase2_build_lemmas re-scans.
+            # A rebuild relinks everything anyway, so skip the probe entirely then.
+            needs_lemmas = bool(args.rebuild_lemmas) or bool(
                 words_con.execute(
                     """
-                    SELECT COUNT(*)
-                    FROM lexemes l
-                    LEFT JOIN lexeme_lemmas ll ON ll.lexeme_id = l.id
-                    WHERE ll.lexeme_id IS NULL
+                    SELECT EXISTS (
+                      SELECT 1
+                      FROM lexemes l
+                      LEFT JOIN lexeme_lemmas ll ON ll.lexeme_id = l.id
+                      WHERE ll.lexeme_id IS NULL
+                    )
                     """
                 ).fetchone()[0]
-                or 0
             )
-            if args.rebuild_lemmas or missing_lemmas:
+            if needs_lemmas:
                 linked = _phase2_build_lemmas(words_con, rebuild=bool(args.rebuild_lemmas))
-                if linked == 0 and (args.rebuild_lemmas or missing_lemmas):
+                if linked == 0:
                     words_con.commit()
                     _run_external_lemma_builder(
                         root, words_db_path=words_db_path, rebuild=bool(args.rebuild_lemmas)
@@ -1776,15 +1811,13 @@ def main(argv: list[str]) -> int:
                     "SELECT COALESCE(SUM(total_seconds), 0) FROM toggl_daily WHERE day >= ? AND day <= ?",
                     (sum_start.isoformat(), today.isoformat()),
                 ).fetchone()[0]
-                or 0
             )
             lifetime_seconds += int(cfg.toggl_baseline_seconds)
             today_seconds = int(
                 con.execute(
-                    "SELECT COALESCE(total_seconds, 0) FROM toggl_daily WHERE day=?",
+                    "SELECT COALESCE((SELECT total_seconds FROM toggl_daily WHERE day=?), 0)",
                     (today.isoformat(),),
                 ).fetchone()[0]
-                or 0
             )
             breakdown_rows = con.execute(
                 """